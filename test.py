@@ -1,7 +1,8 @@
+import struct
 import numpy as np
-from stl import mesh
 from shapely.geometry import Polygon
-from shapely.ops import triangulate
+from shapely.geometry.polygon import orient
+import mapbox_earcut as earcut
 from matplotlib.textpath import TextPath
 from matplotlib.font_manager import FontProperties
 from matplotlib.path import Path
@@ -18,7 +19,19 @@ CURVE_STEPS = 8   # 🔴 INCREASE THIS FOR SMOOTHER CURVES (6–12 good)
 
 # ==========================================
 
-faces = []
+# Unit box, scaled per call by add_box()
+BOX_CORNERS = np.array([
+    [0,0,0],[1,0,0],[1,1,0],[0,1,0],
+    [0,0,1],[1,0,1],[1,1,1],[0,1,1]
+], dtype=np.float32)
+BOX_FACES = np.array([
+    [0,1,2],[0,2,3],
+    [4,6,5],[4,7,6],
+    [0,4,5],[0,5,1],
+    [1,5,6],[1,6,2],
+    [2,6,7],[2,7,3],
+    [3,7,4],[3,4,0]
+], dtype=np.int32)
 
 # ---------- HIGH-RES TEXT PATH ----------
 font = FontProperties(family="DejaVu Sans", weight="bold")
@@ -46,76 +59,124 @@ D = (maxy - miny) + 2 * MARGIN
 OX = MARGIN - minx
 OY = MARGIN - miny
 
+# Handle multi-polygons; orient every part (clockwise exterior,
+# counter-clockwise holes) so extrude() winds walls the same way as caps
+if text_shape.geom_type == "Polygon":
+    parts = [orient(text_shape, -1.0)]
+else:
+    parts = [orient(g, -1.0) for g in text_shape.geoms]
+
+# ---------- CAP TRIANGULATION ----------
+def ring_points(poly):
+    # Exterior then holes, each without its closing point, repeated points or
+    # the collinear points interpolated() adds along straight edges
+    out = []
+    for ring in [poly.exterior] + list(poly.interiors):
+        pts = np.array(ring.coords)[:-1]
+        pts = pts[np.any(pts != np.roll(pts, 1, axis=0), axis=1)]
+        d_in = pts - np.roll(pts, 1, axis=0)
+        d_out = np.roll(pts, -1, axis=0) - pts
+        cross = d_in[:,0]*d_out[:,1] - d_in[:,1]*d_out[:,0]
+        scale = np.linalg.norm(d_in, axis=1) * np.linalg.norm(d_out, axis=1)
+        out.append(pts[np.abs(cross) > 1e-9 * scale].astype(np.float32))
+    return out
+
+def triangulate_cap(rings):
+    # Returns (T, 3) counter-clockwise triangles as indices into np.vstack(rings)
+    ends = np.cumsum([len(r) for r in rings])
+    return earcut.triangulate_float32(np.vstack(rings), ends).reshape(-1, 3)
+
+rings = [ring_points(g) for g in parts]
+caps = [triangulate_cap(r) for r in rings]
+
+# ---------- MESH BUFFERS ----------
+# Count every vertex and triangle up front so each buffer is allocated once:
+# the base box, 2 copies of every ring point, 2 per cap triangle and ring edge.
+n_vertices = len(BOX_CORNERS)
+n_faces = len(BOX_FACES)
+for poly_rings, tris in zip(rings, caps):
+    n_points = sum(len(r) for r in poly_rings)
+    n_vertices += 2 * n_points
+    n_faces += 2 * len(tris) + 2 * n_points
+
+vertices = np.empty((n_vertices, 3), dtype=np.float32)
+faces = np.empty((n_faces, 3), dtype=np.int32)   # indices into vertices
+nv = 0
+k = 0
+
+def alloc_vertices(count):
+    global nv
+    first = nv
+    nv += count
+    return first
+
+def add_faces(batch):
+    global k
+    faces[k:k+len(batch)] = batch
+    k += len(batch)
+
 # ---------- BASE ----------
 def add_box(x, y, z):
-    v = np.array([
-        [0,0,0],[x,0,0],[x,y,0],[0,y,0],
-        [0,0,z],[x,0,z],[x,y,z],[0,y,z]
-    ])
-    f = [
-        [0,1,2],[0,2,3],
-        [4,6,5],[4,7,6],
-        [0,4,5],[0,5,1],
-        [1,5,6],[1,6,2],
-        [2,6,7],[2,7,3],
-        [3,7,4],[3,4,0]
-    ]
-    for a,b,c in f:
-        faces.append([v[a],v[b],v[c]])
+    b = alloc_vertices(len(BOX_CORNERS))
+    vertices[b:b+len(BOX_CORNERS)] = BOX_CORNERS * np.array([x, y, z], dtype=np.float32)
+    add_faces(b + BOX_FACES)
 
 add_box(W, D, BASE_HEIGHT)
 
 # ---------- EXTRUDE WITH HOLES ----------
-def extrude(poly):
-    for tri in triangulate(poly):
-        pts = np.array(tri.exterior.coords)[:3]
-
-        # bottom
-        faces.append([
-            [pts[0][0]+OX, pts[0][1]+OY, BASE_HEIGHT],
-            [pts[1][0]+OX, pts[1][1]+OY, BASE_HEIGHT],
-            [pts[2][0]+OX, pts[2][1]+OY, BASE_HEIGHT]
-        ])
-
-        # top
-        faces.append([
-            [pts[0][0]+OX, pts[0][1]+OY, BASE_HEIGHT+LETTER_HEIGHT],
-            [pts[2][0]+OX, pts[2][1]+OY, BASE_HEIGHT+LETTER_HEIGHT],
-            [pts[1][0]+OX, pts[1][1]+OY, BASE_HEIGHT+LETTER_HEIGHT]
-        ])
-
-    def wall(coords, reverse=False):
-        if reverse:
-            coords = coords[::-1]
-        for i in range(len(coords)-1):
-            x1,y1 = coords[i]
-            x2,y2 = coords[i+1]
-            faces.append([
-                [x1+OX,y1+OY,BASE_HEIGHT],
-                [x2+OX,y2+OY,BASE_HEIGHT],
-                [x2+OX,y2+OY,BASE_HEIGHT+LETTER_HEIGHT]
-            ])
-            faces.append([
-                [x1+OX,y1+OY,BASE_HEIGHT],
-                [x2+OX,y2+OY,BASE_HEIGHT+LETTER_HEIGHT],
-                [x1+OX,y1+OY,BASE_HEIGHT+LETTER_HEIGHT]
-            ])
-
-    wall(list(poly.exterior.coords))
-    for hole in poly.interiors:
-        wall(list(hole.coords), reverse=True)
-
-# Handle multi-polygons
-if text_shape.geom_type == "Polygon":
-    extrude(text_shape)
-else:
-    for g in text_shape.geoms:
-        extrude(g)
+def extrude(poly_rings, tris):
+    # Caps and walls share one block: every ring point at the base height,
+    # then again at the letter height
+    n = sum(len(r) for r in poly_rings)
+    b = alloc_vertices(2*n)
+    bot = vertices[b:b+n]
+    top = vertices[b+n:b+2*n]
+    np.concatenate(poly_rings, out=bot[:, :2])
+    bot[:, :2] += (OX, OY)
+    bot[:, 2] = BASE_HEIGHT
+    top[:, :2] = bot[:, :2]
+    top[:, 2] = BASE_HEIGHT + LETTER_HEIGHT
+
+    cap = np.empty((2*len(tris), 3), dtype=np.int32)
+    cap[0::2] = b + tris                 # bottom
+    cap[1::2] = b + n + tris[:, ::-1]    # top
+    add_faces(cap)
+
+    # Walls: edge i -> i+1 around each ring; parts are oriented so the
+    # letter body is always to the right of that edge
+    start = 0
+    for ring in poly_rings:
+        m = len(ring)
+        i = b + start + np.arange(m)
+        j = b + start + (np.arange(m) + 1) % m
+        side = np.empty((2*m, 3), dtype=np.int32)
+        side[0::2] = np.stack([i, j, n+j], axis=1)
+        side[1::2] = np.stack([i, n+j, n+i], axis=1)
+        add_faces(side)
+        start += m
+
+for poly_rings, tris in zip(rings, caps):
+    extrude(poly_rings, tris)
 
 # ---------- EXPORT ----------
-data = np.zeros(len(faces), dtype=mesh.Mesh.dtype)
-for i, f in enumerate(faces):
-    data["vectors"][i] = f
-
-mesh.Mesh(data).save("SARA_nameplate_high_quality.stl")
+# Binary STL: 80-byte header, triangle count, then 50-byte records
+STL_RECORD = np.dtype([
+    ("normal", "<f4", 3), ("vectors", "<f4", (3, 3)), ("attr", "<u2")
+])
+
+def triangle_normals(tris):
+    n = np.cross(tris[:,1] - tris[:,0], tris[:,2] - tris[:,0])
+    n /= np.linalg.norm(n, axis=1, keepdims=True) + 1e-30
+    return n
+
+def save_stl(path, tris):
+    data = np.zeros(len(tris), dtype=STL_RECORD)
+    data["vectors"] = tris
+    data["normal"] = triangle_normals(tris)
+    with open(path, "wb") as f:
+        f.write(b"\0" * 80)
+        f.write(struct.pack("<I", len(data)))
+        f.write(data.tobytes())
+
+save_stl("SARA_nameplate_high_quality.stl", vertices[:nv][faces])
 print("✅ High-quality realistic nameplate created")